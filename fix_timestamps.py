@@ -1,39 +1,139 @@
 import csv
+import mmap
+import os
+import re
 import sys
 from datetime import datetime
+from itertools import compress, repeat
+from operator import ge
 
-def fix_timestamps(input_file, output_file):
-    """Add createdAt and updatedAt timestamp values to each data row"""
+# Read/write in 1 MiB chunks so large CSVs stream with few syscalls
+BUFFER_SIZE = 1 << 20
+
+# A \r that does not start a \r\n ends a record in text mode, which the
+# byte path does not handle
+BARE_CR = re.compile(rb'\r(?!\n)')
+
+def format_timestamp(dt):
+    """Format a datetime as YYYY-MM-DD HH:mm:ss without going through strftime"""
+    return (f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} "
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}")
+
+def _fix_timestamps_bytes(data, output_file, current_timestamp, crlf):
+    """Append the timestamp columns by rewriting raw line blocks
     
-    # Get current timestamp in YYYY-MM-DD HH:mm:ss format
-    current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    Only valid for files without quoted fields, where every comma is a
+    delimiter, and whose only \r bytes are part of \r\n line endings
+    (flagged by crlf). Lines are written with csv.writer's \r\n terminator so the
+    output matches the csv path byte for byte.
+    """
+    suffix = f",{current_timestamp},{current_timestamp}\r\n".encode()
+    find = data.find
+    rfind = data.rfind
+    size = len(data)
     
-    with open(input_file, 'r', encoding='utf-8') as infile, \
-         open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+    with open(output_file, 'wb', buffering=BUFFER_SIZE) as outfile:
+        write = outfile.write
+        
+        # Header row - keep as is
+        nl = find(b'\n')
+        if nl == -1:
+            nl = size
+        write(data[:nl].rstrip(b'\r') + b'\r\n')
+        pos = nl + 1
+        
+        while pos < size:
+            # Take roughly BUFFER_SIZE bytes, ending on a line boundary
+            end = rfind(b'\n', pos, pos + BUFFER_SIZE)
+            if end == -1:
+                end = find(b'\n', pos + BUFFER_SIZE)
+                if end == -1:  # Last line without a trailing newline
+                    end = size
+            
+            # Filter and strip the block's lines with C-level iterators, so
+            # no Python bytecode runs per row
+            lines = data[pos:end].split(b'\n')
+            if crlf:  # LF-only files need no per-line \r stripping
+                lines = list(map(bytes.rstrip, lines, repeat(b'\r')))
+            enough_fields = map(ge, map(bytes.count, lines, repeat(b',')), repeat(5))
+            rows = suffix.join(compress(lines, enough_fields))
+            if rows:
+                write(rows)
+                write(suffix)
+            pos = end + 1
+
+def _fix_timestamps_csv(input_file, output_file, current_timestamp):
+    """Append the timestamp columns using the csv module"""
+    with open(input_file, 'r', encoding='utf-8', buffering=BUFFER_SIZE) as infile, \
+         open(output_file, 'w', encoding='utf-8', newline='',
+              buffering=BUFFER_SIZE) as outfile:
         
         reader = csv.reader(infile)
         writer = csv.writer(outfile)
+        writerow = writer.writerow
+        write = outfile.write
+        ts_pair = [current_timestamp, current_timestamp]
+        suffix = f",{current_timestamp},{current_timestamp}\r\n"
+        
+        # Header row - keep as is
+        header = next(reader, None)
+        if header is None:
+            return
+        writerow(header)
         
-        for row_num, row in enumerate(reader):
-            if row_num == 0:  # Header row - keep as is
-                writer.writerow(row)
-            elif len(row) >= 6:  # Data row with enough fields
-                # Add timestamp values to the end
-                new_row = row + [current_timestamp, current_timestamp]
-                writer.writerow(new_row)
-            else:
-                # Skip rows that don't have enough fields
-                continue
+        # Short rows are rare, so there is no raw comma-count precheck here
+        # like the bytes path has: a line may continue a quoted multi-line
+        # field, and tracking quote state per line costs more than it saves
+        for row in reader:
+            field_count = len(row)
+            if field_count >= 6:  # Data row with enough fields
+                # Rows with nothing to quote are joined directly with the
+                # precomputed timestamp suffix, skipping csv.writer
+                line = ','.join(row)
+                if (line.count(',') == field_count - 1 and '"' not in line
+                        and '\n' not in line and '\r' not in line):
+                    write(line + suffix)
+                else:
+                    row.extend(ts_pair)
+                    writerow(row)
+
+def fix_timestamps(input_file, output_file):
+    """Add createdAt and updatedAt timestamp values to each data row
+    
+    Returns the timestamp string that was written.
+    """
+    
+    # Get current timestamp in YYYY-MM-DD HH:mm:ss format
+    current_timestamp = format_timestamp(datetime.now())
+    
+    # Truncating the output while the input is mapped would crash with SIGBUS
+    if os.path.exists(output_file) and os.path.samefile(input_file, output_file):
+        raise ValueError(f"Input and output must be different files: {output_file}")
+    
+    with open(input_file, 'rb') as infile:
+        # mmap cannot map an empty file; the csv path handles that case
+        if os.fstat(infile.fileno()).st_size:
+            with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # Quoted fields may hide commas and newlines, and bare \r
+                # line endings need universal newline handling, so only
+                # those files need the full csv state machine
+                crlf = data.find(b'\r') != -1
+                if data.find(b'"') == -1 and not (crlf and BARE_CR.search(data)):
+                    _fix_timestamps_bytes(data, output_file, current_timestamp, crlf)
+                    return current_timestamp
+    
+    _fix_timestamps_csv(input_file, output_file, current_timestamp)
+    return current_timestamp
 
 if __name__ == "__main__":
     input_file = "Products_clean.csv"
     output_file = "Products_fixed_timestamps.csv"
     
     try:
-        fix_timestamps(input_file, output_file)
+        current_timestamp = fix_timestamps(input_file, output_file)
         print(f"Successfully added timestamp values to CSV from {input_file} to {output_file}")
         print(f"Timestamp format: YYYY-MM-DD HH:mm:ss")
-        print(f"Current timestamp used: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"Current timestamp used: {current_timestamp}")
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -15,11 +15,36 @@ Usage:
 """
 
 import argparse
+import io
 import json
 import requests
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to requests' stdlib decoding
+    orjson = None
+
+# Static part of the test notification payload; only the data block varies
+TEST_NOTIFICATION_FIELDS = {
+    "title": "🧪 Test Notification",
+    "body": "This is a test notification from the FCM testing script",
+    "type": "test"
+}
+
+def decode_json(response: requests.Response) -> Any:
+    """Decode a JSON response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 class FCMTester:
     def __init__(self, supabase_url: str, supabase_anon_key: str):
         self.supabase_url = supabase_url.rstrip('/')
@@ -29,6 +54,26 @@ class FCMTester:
             'Authorization': f'Bearer {supabase_anon_key}',
             'Content-Type': 'application/json'
         }
+        # Request bodies that never change are encoded once up front
+        self._health_check_body = json.dumps({"test": "health_check"}).encode()
+        
+        # Reuse one keep-alive connection pool so consecutive calls skip
+        # the TCP and TLS handshakes
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        """Close the pooled HTTP connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def test_token_registration(self) -> bool:
         """Test FCM token registration by checking the database"""
@@ -36,24 +81,26 @@ class FCMTester:
         
         try:
             # Get FCM tokens from database
-            response = requests.post(
-                f"{self.supabase_url}/rest/v1/rpc/get_all_active_fcm_tokens",
-                headers=self.headers
+            response = self.session.post(
+                f"{self.supabase_url}/rest/v1/rpc/get_all_active_fcm_tokens"
             )
             
             if response.status_code == 200:
-                tokens = response.json()
+                tokens = decode_json(response)
                 print(f"✅ Found {len(tokens)} active FCM tokens in database")
                 
                 if tokens:
                     print("\n📱 Active FCM tokens:")
-                    for i, token in enumerate(tokens[:5]):  # Show first 5
-                        print(f"  {i+1}. User: {token['user_id']}")
-                        print(f"     Token: {token['token'][:20]}...")
-                        print(f"     Device: {token['device_id']}")
-                        print(f"     Platform: {token['platform']}")
-                        print(f"     Updated: {token['updated_at']}")
-                        print()
+                    # Show first 5, written in one batch instead of a print per field
+                    sys.stdout.writelines(
+                        f"  {i+1}. User: {token['user_id']}\n"
+                        f"     Token: {token['token'][:20]}...\n"
+                        f"     Device: {token['device_id']}\n"
+                        f"     Platform: {token['platform']}\n"
+                        f"     Updated: {token['updated_at']}\n"
+                        "\n"
+                        for i, token in enumerate(islice(tokens, 5))
+                    )
                 else:
                     print("⚠️  No active FCM tokens found. Make sure to register tokens from your iOS app first.")
                 
@@ -80,11 +127,9 @@ class FCMTester:
 
         # Prepare notification payload
         payload = {
-            "title": "🧪 Test Notification",
-            "body": "This is a test notification from the FCM testing script",
-            "type": "test",
+            **TEST_NOTIFICATION_FIELDS,
             "data": {
-                "test_id": f"test_{int(__import__('time').time())}",
+                "test_id": f"test_{int(time.time())}",
                 "source": "testing_script"
             }
         }
@@ -96,20 +141,20 @@ class FCMTester:
 
         try:
             # Call the edge function
-            response = requests.post(
+            response = self.session.post(
                 f"{self.supabase_url}/functions/v1/send-test-notification",
-                headers=self.headers,
-                json=payload
+                data=json.dumps(payload).encode()
             )
 
             if response.status_code == 200:
-                result = response.json()
+                result = decode_json(response)
                 print("✅ Test notification sent successfully!")
                 print(f"   Message: {result.get('message', 'No message')}")
                 
                 if 'results' in result:
-                    print(f"   Sent to {len(result['results'])} device(s)")
-                    for i, res in enumerate(result['results'][:3]):  # Show first 3
+                    results = result['results']
+                    print(f"   Sent to {len(results)} device(s)")
+                    for i, res in enumerate(islice(results, 3)):  # Show first 3
                         print(f"     {i+1}. Device: {res['device_id']} ({res['platform']})")
                         print(f"        Token: {res['token']}")
                 
@@ -137,10 +182,9 @@ class FCMTester:
         
         try:
             # Try to call the edge function with a simple request
-            response = requests.post(
+            response = self.session.post(
                 f"{self.supabase_url}/functions/v1/send-test-notification",
-                headers=self.headers,
-                json={"test": "health_check"}
+                data=self._health_check_body
             )
             
             # We expect a 400 error for missing required fields, which means the function is working
@@ -161,23 +205,24 @@ class FCMTester:
         print(f"🔍 Getting FCM tokens for user: {user_id}")
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.supabase_url}/rest/v1/rpc/get_user_fcm_tokens",
-                headers=self.headers,
-                json={"p_user_id": user_id}
+                data=json.dumps({"p_user_id": user_id}).encode()
             )
             
             if response.status_code == 200:
-                tokens = response.json()
+                tokens = decode_json(response)
                 print(f"✅ Found {len(tokens)} FCM tokens for user {user_id}")
                 
-                for i, token in enumerate(tokens):
-                    print(f"  {i+1}. Token: {token['token'][:20]}...")
-                    print(f"     Device: {token['device_id']}")
-                    print(f"     Platform: {token['platform']}")
-                    print(f"     App Version: {token['app_version']}")
-                    print(f"     Updated: {token['updated_at']}")
-                    print()
+                sys.stdout.writelines(
+                    f"  {i+1}. Token: {token['token'][:20]}...\n"
+                    f"     Device: {token['device_id']}\n"
+                    f"     Platform: {token['platform']}\n"
+                    f"     App Version: {token['app_version']}\n"
+                    f"     Updated: {token['updated_at']}\n"
+                    "\n"
+                    for i, token in enumerate(tokens)
+                )
                 
                 return True
             else:
@@ -189,6 +234,32 @@ class FCMTester:
             print(f"❌ Error getting user FCM tokens: {e}")
             return False
 
+class _ThreadCapturedStdout:
+    """stdout replacement that lets worker threads buffer their own output"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        return getattr(self._local, 'buffer', self.stream).write(text)
+
+    def writelines(self, lines):
+        getattr(self._local, 'buffer', self.stream).writelines(lines)
+
+    def flush(self):
+        self.stream.flush()
+
+    def capture(self, func):
+        """Run func, returning its result and everything it printed"""
+        self._local.buffer = io.StringIO()
+        try:
+            result = func()
+        finally:
+            output = self._local.buffer.getvalue()
+            del self._local.buffer
+        return result, output
+
 def main():
     parser = argparse.ArgumentParser(description='Test FCM notification system')
     parser.add_argument('--supabase-url', required=True, help='Supabase project URL')
@@ -208,54 +279,58 @@ def main():
 
     args = parser.parse_args()
 
-    # Initialize tester
-    tester = FCMTester(args.supabase_url, args.supabase_key)
-
     success_count = 0
     total_tests = 0
 
-    if args.run_all_tests:
-        print("🚀 Running all FCM tests...\n")
-        
-        # Test edge function health
-        total_tests += 1
-        if tester.test_edge_function_health():
-            success_count += 1
-        print()
-
-        # Test token registration
-        total_tests += 1
-        if tester.test_token_registration():
-            success_count += 1
-        print()
-
-        # Send test notification to all users
-        total_tests += 1
-        if tester.send_test_notification(test_all_users=True):
-            success_count += 1
-        print()
+    # Initialize tester
+    with FCMTester(args.supabase_url, args.supabase_key) as tester:
+        if args.run_all_tests:
+            print("🚀 Running all FCM tests...\n")
+            
+            # The tests hit independent endpoints, so run them concurrently
+            # and print each one's buffered output in order once all finish
+            tests = [
+                tester.test_edge_function_health,
+                tester.test_token_registration,
+                partial(tester.send_test_notification, test_all_users=True)
+            ]
+            stdout = _ThreadCapturedStdout(sys.stdout)
+            sys.stdout = stdout
+            try:
+                with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+                    futures = [executor.submit(stdout.capture, test) for test in tests]
+                    results = [future.result() for future in futures]
+            finally:
+                sys.stdout = stdout.stream
 
-    else:
-        # Run individual tests
-        if args.test_edge_function:
-            total_tests += 1
-            if tester.test_edge_function_health():
-                success_count += 1
-
-        if args.test_token_registration:
-            total_tests += 1
-            if tester.test_token_registration():
-                success_count += 1
-
-        if args.send_test_notification:
-            total_tests += 1
-            if tester.send_test_notification(user_id=args.user_id, test_all_users=args.test_all_users):
-                success_count += 1
-
-        if args.get_user_tokens:
-            total_tests += 1
-            if tester.get_user_fcm_tokens(args.get_user_tokens):
-                success_count += 1
+            for passed, output in results:
+                total_tests += 1
+                sys.stdout.write(output)
+                if passed:
+                    success_count += 1
+                print()
+
+        else:
+            # Run individual tests
+            if args.test_edge_function:
+                total_tests += 1
+                if tester.test_edge_function_health():
+                    success_count += 1
+
+            if args.test_token_registration:
+                total_tests += 1
+                if tester.test_token_registration():
+                    success_count += 1
+
+            if args.send_test_notification:
+                total_tests += 1
+                if tester.send_test_notification(user_id=args.user_id, test_all_users=args.test_all_users):
+                    success_count += 1
+
+            if args.get_user_tokens:
+                total_tests += 1
+                if tester.get_user_fcm_tokens(args.get_user_tokens):
+                    success_count += 1
 
     # Print summary
     print(f"\n📊 Test Results: {success_count}/{total_tests} tests passed")